@@ -1,43 +1,246 @@
-from flask import Flask, request, send_file, jsonify
+from flask import Flask, Request, request, send_file, jsonify
 from werkzeug.utils import secure_filename
+import hashlib
+import io
+import json
 import os
-import uuid
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from flyer_generator import generate_flyer
-from config import UPLOAD_FOLDER, ALLOWED_EXTENSIONS
+from config import UPLOAD_FOLDER, CACHE_FOLDER, ALLOWED_EXTENSIONS
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
+if not os.path.exists(CACHE_FOLDER):
+    os.makedirs(CACHE_FOLDER)
+
+# Path constants, computed once instead of per request
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+_TEMPLATE_DIR = os.path.join(_BASE_DIR, 'template')
+_DEFAULT_IMAGE = os.path.join(_BASE_DIR, 'image.png')
+_DEFAULT_IMAGE_EXISTS = os.path.exists(_DEFAULT_IMAGE)
+
+# Cache for the /templates listing, invalidated when the directory mtime changes
+_TEMPLATE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+_TEMPLATE_CACHE = {"mtime": None, "data": None, "dirty": True}
+_TEMPLATE_CACHE_LOCK = threading.Lock()
+
+# Optional: event-driven invalidation via inotify (through watchdog) gives a
+# zero-syscall steady state; without watchdog we stat the dir per request.
+# The observer itself starts lazily per process (see
+# _ensure_background_threads); this flag flips once it is actually running.
+_HAVE_TEMPLATE_WATCHER = False
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+
+    class _TemplateDirHandler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            with _TEMPLATE_CACHE_LOCK:
+                _TEMPLATE_CACHE["dirty"] = True
+
+    _HAVE_WATCHDOG = True
+except ImportError:
+    _HAVE_WATCHDOG = False
+
+_ALLOWED_SUFFIXES = tuple('.' + ext.lower() for ext in ALLOWED_EXTENSIONS)
+
+def _rand_id():
+    """Random filename token; cheaper than uuid4 and plenty unique for uploads."""
+    return os.urandom(12).hex()
 
 def allowed_file(filename):
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return bool(filename) and filename.lower().endswith(_ALLOWED_SUFFIXES)
 
-def cleanup_files(file_paths):
-    for path in file_paths:
+# Bounded process pool so renders run off the request threads: bounds
+# concurrency, parallelizes across cores and keeps PIL off the GIL.
+# Created lazily so gunicorn's preload/fork doesn't inherit a live pool.
+# Each gunicorn worker gets its slice of the cores (gunicorn_conf exports
+# FLYER_WEB_WORKERS) so the pools together stay at ~cpu_count processes.
+_WEB_WORKERS = max(1, int(os.environ.get('FLYER_WEB_WORKERS', '1')))
+RENDER_PROCS = max(1, (os.cpu_count() or 1) // _WEB_WORKERS)
+_RENDER_POOL = None
+_RENDER_POOL_LOCK = threading.Lock()
+RENDER_TIMEOUT = 60
+
+# Uploads up to this size are handed to the renderer as in-memory bytes
+# instead of being staged in UPLOAD_FOLDER
+MAX_IN_MEMORY_IMAGE = 8 * 1024 * 1024
+
+class BigUploadRequest(Request):
+    """Parse large multipart uploads into a 1 MiB-buffered temp file in
+    UPLOAD_FOLDER instead of Werkzeug's spooled /tmp file, so the parser's
+    small chunks coalesce into large sequential writes. Small uploads keep
+    the default in-memory spool."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        size = content_length or total_content_length
+        if size and size > MAX_IN_MEMORY_IMAGE:
+            return tempfile.NamedTemporaryFile(
+                'wb+', buffering=1024 * 1024, dir=UPLOAD_FOLDER, prefix='tmp_upload_')
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+app.request_class = BigUploadRequest
+
+# In-flight render futures keyed by cache key, so simultaneous identical
+# requests coalesce onto a single render instead of racing the pool.
+_INFLIGHT = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+# Overload guard: once this many renders are queued or running, reject fast
+# with 503 instead of letting requests pile up behind the pool. Scaled to
+# this worker's pool so the service-wide admission stays ~2x cpu_count.
+MAX_QUEUE_DEPTH = 2 * RENDER_PROCS
+_PENDING_RENDERS = 0
+
+def _render_done(_future):
+    global _PENDING_RENDERS
+    with _INFLIGHT_LOCK:
+        _PENDING_RENDERS -= 1
+
+def _render_flyer_bytes(params):
+    """Worker-side entrypoint: render and return raw PNG bytes (picklable)."""
+    return generate_flyer(params).getvalue()
+
+def get_render_pool():
+    global _RENDER_POOL
+    if _RENDER_POOL is None:
+        with _RENDER_POOL_LOCK:
+            if _RENDER_POOL is None:
+                _RENDER_POOL = ProcessPoolExecutor(max_workers=RENDER_PROCS)
+    return _RENDER_POOL
+
+def render_cache_key(params):
+    """Content-addressable key for a render: the normalized params plus the
+    mtimes of any referenced image files, so edits invalidate the entry."""
+    payload = dict(params)
+    img_bytes = payload.pop('image_bytes', None)
+    if img_bytes is not None:
+        payload['image_bytes_digest'] = hashlib.blake2b(img_bytes, digest_size=16).hexdigest()
+    for path_key in ('image_path', 'bg_image_path'):
+        path = params.get(path_key)
         if path and os.path.exists(path):
+            payload[f"{path_key}_mtime"] = os.stat(path).st_mtime_ns
+    blob = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.blake2b(blob, digest_size=16).hexdigest()
+
+def _flyer_response(cache_path, cache_key):
+    """Serve a cached flyer with ETag + long-lived cache headers so repeat
+    previews resolve to a 304 instead of a re-download."""
+    resp = send_file(cache_path, mimetype='image/png', conditional=True, etag=cache_key)
+    resp.cache_control.no_cache = None  # send_file defaults to no-cache
+    resp.cache_control.public = True
+    resp.cache_control.max_age = 3600
+    return resp
+
+def save_upload(file_storage, dest_path, chunk_size=1024 * 1024):
+    """Stream an uploaded file straight to disk in large chunks.
+
+    Avoids FileStorage.save's intermediate spooled temp file and combines
+    small multipart chunks into large sequential writes.
+    """
+    with open(dest_path, 'wb') as out:
+        shutil.copyfileobj(file_storage.stream, out, length=chunk_size)
+
+# Temp-file deletion happens off the request thread so responses aren't
+# blocked on unlink syscalls; a periodic sweeper catches leftovers from
+# crashes and ages out old render-cache entries.
+_CLEANUP_Q = queue.SimpleQueue()
+STALE_UPLOAD_AGE = 3600
+STALE_CACHE_AGE = 24 * 3600
+SWEEP_INTERVAL = 300
+
+def _cleanup_worker():
+    while True:
+        path = _CLEANUP_Q.get()
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            app.logger.error(f"Error deleting file {path}: {e}")
+
+def _stale_file_sweeper():
+    while True:
+        time.sleep(SWEEP_INTERVAL)
+        now = time.time()
+        for folder, max_age in ((UPLOAD_FOLDER, STALE_UPLOAD_AGE),
+                                (CACHE_FOLDER, STALE_CACHE_AGE)):
+            cutoff = now - max_age
             try:
-                os.remove(path)
+                with os.scandir(folder) as entries:
+                    for entry in entries:
+                        if entry.is_file() and entry.stat().st_mtime < cutoff:
+                            _CLEANUP_Q.put(entry.path)
+            except OSError as e:
+                app.logger.error(f"Stale sweep of {folder} failed: {e}")
+
+# Started lazily per process rather than at import: with preload_app the
+# module imports in the gunicorn master, and forked workers inherit neither
+# the threads nor the watchdog observer started there.
+_BG_THREADS_STARTED = False
+_BG_THREADS_LOCK = threading.Lock()
+
+def _ensure_background_threads():
+    global _BG_THREADS_STARTED, _HAVE_TEMPLATE_WATCHER
+    if _BG_THREADS_STARTED:
+        return
+    with _BG_THREADS_LOCK:
+        if _BG_THREADS_STARTED:
+            return
+        threading.Thread(target=_cleanup_worker, daemon=True).start()
+        threading.Thread(target=_stale_file_sweeper, daemon=True).start()
+        if _HAVE_WATCHDOG:
+            try:
+                observer = Observer()
+                observer.daemon = True
+                observer.schedule(_TemplateDirHandler(), _TEMPLATE_DIR)
+                observer.start()
+                _HAVE_TEMPLATE_WATCHER = True
             except Exception as e:
-                app.logger.error(f"Error deleting file {path}: {e}")
+                app.logger.error(f"Template watcher failed to start: {e}")
+        _BG_THREADS_STARTED = True
+
+@app.before_request
+def _start_background_threads():
+    _ensure_background_threads()
+
+def cleanup_files(file_paths):
+    _ensure_background_threads()
+    for path in file_paths:
+        if path:
+            _CLEANUP_Q.put(path)
 
 @app.route('/templates', methods=['GET'])
 def list_templates():
     """List available templates in the template folder."""
     try:
-        template_dir = os.path.join(os.path.dirname(__file__), 'template')
-        if not os.path.exists(template_dir):
+        if not os.path.exists(_TEMPLATE_DIR):
             return jsonify({"templates": []})
-        
-        templates = []
-        for file in os.listdir(template_dir):
-            if file.lower().endswith(('.png', '.jpg', '.jpeg')):
-                template_name = os.path.splitext(file)[0]
-                templates.append(template_name)
-        
-        return jsonify({"templates": sorted(templates)})
+
+        with _TEMPLATE_CACHE_LOCK:
+            if _HAVE_TEMPLATE_WATCHER:
+                stale = _TEMPLATE_CACHE["dirty"] or _TEMPLATE_CACHE["data"] is None
+            else:
+                mtime = os.stat(_TEMPLATE_DIR).st_mtime_ns
+                stale = _TEMPLATE_CACHE["mtime"] != mtime
+            if stale:
+                templates = []
+                with os.scandir(_TEMPLATE_DIR) as entries:
+                    for entry in entries:
+                        if entry.name.lower().endswith(_TEMPLATE_EXTENSIONS):
+                            templates.append(os.path.splitext(entry.name)[0])
+                _TEMPLATE_CACHE["mtime"] = os.stat(_TEMPLATE_DIR).st_mtime_ns
+                _TEMPLATE_CACHE["data"] = sorted(templates)
+                _TEMPLATE_CACHE["dirty"] = False
+            return jsonify({"templates": _TEMPLATE_CACHE["data"]})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -70,65 +273,123 @@ def generate_flyer_endpoint():
         
         # Handle main image upload separately
         img_path = None
+        img_bytes = None
         if 'image' in request.files and request.files['image'].filename != '':
             main_image = request.files['image']
             if not allowed_file(main_image.filename):
                 return jsonify({"error": "Invalid file type for 'image'"}), 400
 
-            # Save main image
-            img_filename = secure_filename(f"{uuid.uuid4()}_{main_image.filename}")
-            img_path = os.path.join(app.config['UPLOAD_FOLDER'], img_filename)
-            main_image.save(img_path)
-            temp_files.append(img_path)
+            # Keep small uploads in memory so the render reads them straight
+            # from a BytesIO instead of a disk write + re-read round trip
+            head = main_image.stream.read(MAX_IN_MEMORY_IMAGE + 1)
+            if len(head) <= MAX_IN_MEMORY_IMAGE:
+                img_bytes = head
+            else:
+                # Oversized: stage on disk as before
+                img_filename = secure_filename(f"{_rand_id()}_{main_image.filename}")
+                img_path = os.path.join(app.config['UPLOAD_FOLDER'], img_filename)
+                with open(img_path, 'wb') as out:
+                    out.write(head)
+                    shutil.copyfileobj(main_image.stream, out, length=1024 * 1024)
+                temp_files.append(img_path)
         
         template_name = data.get('template') or form.get('template')
 
         # Use default image.png as fallback ONLY if no image and no template
-        if not img_path and not template_name:
-            default_path = os.path.join(os.path.dirname(__file__), 'image.png')
-            if os.path.exists(default_path):
-                img_path = default_path
+        if not img_path and img_bytes is None and not template_name and _DEFAULT_IMAGE_EXISTS:
+            img_path = _DEFAULT_IMAGE
 
         # Background image (manual upload)
         bg_image_path = None
         if 'bg_image' in request.files:
             bg_image = request.files['bg_image']
             if bg_image and bg_image.filename != '' and allowed_file(bg_image.filename):
-                bg_filename = secure_filename(f"bg_{uuid.uuid4()}_{bg_image.filename}")
+                bg_filename = secure_filename(f"bg_{_rand_id()}_{bg_image.filename}")
                 bg_image_path = os.path.join(app.config['UPLOAD_FOLDER'], bg_filename)
-                bg_image.save(bg_image_path)
+                save_upload(bg_image, bg_image_path)
                 temp_files.append(bg_image_path)
 
         # Extract parameters
         params = {}
         if img_path:
             params['image_path'] = img_path
+        if img_bytes is not None:
+            params['image_bytes'] = img_bytes
         if bg_image_path:
             params['bg_image_path'] = bg_image_path
         if template_name:
             params['template'] = template_name
 
-        # Combined parameter list - ensuring we capture EVERYTHING
-        all_possible_keys = set(list(data.keys()) + list(form.keys()))
-        for key in all_possible_keys:
-            if key in data:
-                params[key] = data[key]
-            elif key in form:
-                params[key] = form[key]
+        # Combined parameter list - ensuring we capture EVERYTHING.
+        # One pass per source; JSON keys win over form keys.
+        params.update(form.items())
+        params.update(data.items())
 
-        if not params.get('image_path') and not params.get('template') and not params.get('bg_image_path'):
+        if not params.get('image_path') and not params.get('image_bytes') and \
+           not params.get('template') and not params.get('bg_image_path'):
              return jsonify({"error": "No template, image, or background image specified"}), 400
 
-        # Generate flyer
+        # Serve from the on-disk render cache when this exact request was
+        # rendered before (common for template previews and reruns). Keys
+        # derived from per-request temp uploads (random staged filenames)
+        # can never repeat, so caching those would only grow the disk.
+        cacheable = not temp_files
+        cache_key = render_cache_key(params)
+        cache_path = os.path.join(CACHE_FOLDER, f"{cache_key}.png")
+        if cacheable:
+            if request.if_none_match.contains(cache_key):
+                return '', 304
+            if os.path.exists(cache_path):
+                return _flyer_response(cache_path, cache_key)
+
+        # Generate flyer in the render pool; the request thread only waits.
+        # Identical concurrent requests share one future via the dedup map.
+        global _PENDING_RENDERS
+        with _INFLIGHT_LOCK:
+            future = _INFLIGHT.get(cache_key)
+            owns_future = future is None
+            if owns_future:
+                if _PENDING_RENDERS >= MAX_QUEUE_DEPTH:
+                    resp = jsonify({"error": "Server busy, please retry"})
+                    resp.status_code = 503
+                    resp.headers['Retry-After'] = '1'
+                    return resp
+                future = get_render_pool().submit(_render_flyer_bytes, params)
+                _PENDING_RENDERS += 1
+                _INFLIGHT[cache_key] = future
+        if owns_future:
+            # Registered outside the lock: an already-finished future runs
+            # the callback inline, and _render_done takes this same lock.
+            future.add_done_callback(_render_done)
         try:
-            img_io = generate_flyer(params)
+            img_io = io.BytesIO(future.result(timeout=RENDER_TIMEOUT))
         except Exception as e:
             app.logger.error(f"Generation error: {e}")
             import traceback
             traceback.print_exc()
             return jsonify({"error": f"Image processing error: {str(e)}"}), 500
+        finally:
+            if owns_future:
+                with _INFLIGHT_LOCK:
+                    _INFLIGHT.pop(cache_key, None)
+
+        if not cacheable:
+            img_io.seek(0)
+            return send_file(img_io, mimetype='image/png')
+
+        # Populate the cache atomically so concurrent writers can't be seen half-written
+        tmp_path = f"{cache_path}.{_rand_id()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as out:
+                out.write(img_io.getbuffer())
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            app.logger.error(f"Render cache write failed: {e}")
+            cleanup_files([tmp_path])
+            img_io.seek(0)
+            return send_file(img_io, mimetype='image/png')
 
-        return send_file(img_io, mimetype='image/png')
+        return _flyer_response(cache_path, cache_key)
 
     except Exception as e:
         app.logger.error(f"Server error: {e}")
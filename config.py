@@ -1,6 +1,9 @@
 import os
+import types
 
-DEFAULT_CONFIG = {
+# Read-only: shared across requests, so callers layer params on top
+# (e.g. via ChainMap) instead of copying it per render.
+DEFAULT_CONFIG = types.MappingProxyType({
     # Layout & Sizing
     "flyer_width": 1200,
     "flyer_height": 1600,
@@ -38,12 +41,13 @@ DEFAULT_CONFIG = {
     "tagline": "ELEVATING YOUR VISION",
     "cta_text": "WWW.CODEES-CM.COM",
     "headline": "MODERN SOLUTIONS FOR YOUR BUSINESS",
-    "features": [
+    "features": (
         {"title": "INNOVATION", "text": "Driving forward with cutting-edge technology and creative strategies."},
         {"title": "STRATEGY", "text": "Tailored approaches designed to maximize your market impact."},
         {"title": "RESULTS", "text": "Measuring success through tangible growth and performance metrics."}
-    ]
-}
+    )
+})
 
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
+CACHE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
@@ -1,6 +1,23 @@
+from concurrent.futures import ProcessPoolExecutor
+
 from flyer_generator import generate_flyer
 import os
 
+def _atomic_write(path, data):
+    """Write through a temp name and os.replace so a crash mid-write can't
+    leave a truncated PNG behind for downstream runs to trip over."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb", buffering=1 << 20) as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def _render(item):
+    """Top-level worker (required for pickling): render one flyer to disk."""
+    filename, params = item
+    print(f"Generating {filename}...")
+    _atomic_write(filename, generate_flyer(params).read())
+    return filename
+
 def test_templates():
     base_params = {
         "image_path": "image.png",
@@ -17,54 +34,49 @@ def test_templates():
     }
 
     # Test 1: Zenith Modern (Glassmorphism)
-    print("Generating Zenith Modern...")
     p1 = base_params.copy()
     p1["template_id"] = "zenith_modern"
     p1["primary_color"] = "#E67E22"
-    with open("test_zenith.png", "wb") as f:
-        f.write(generate_flyer(p1).read())
 
     # Test 2: Elite Corporate (Minimalist White)
-    print("Generating Elite Corporate...")
     p2 = base_params.copy()
     p2["template_id"] = "modern_corporate"
     p2["primary_color"] = "#2980B9"
-    with open("test_elite.png", "wb") as f:
-        f.write(generate_flyer(p2).read())
 
     # Test 3: Bold Minimalist (Agency style)
-    print("Generating Bold Minimalist...")
     p3 = base_params.copy()
     p3["template_id"] = "marketing_agency"
     p3["primary_color"] = "#F1C40F"
     p3["headline"] = "STAY\nBOLD."
-    with open("test_bold.png", "wb") as f:
-        f.write(generate_flyer(p3).read())
 
     # Test 4: Social Post
-    print("Generating Social Post...")
     p4 = base_params.copy()
     p4["template_id"] = "social_post"
-    with open("test_social.png", "wb") as f:
-        f.write(generate_flyer(p4).read())
 
     # Test 5: Codees Minimal
-    print("Generating Codees Minimal...")
     p5 = base_params.copy()
     p5["template_id"] = "codees_minimal"
     p5["headline"] = "The Hidden Crisis Behind Cameroon's Hustle Culture"
     p5["tagline"] = "Mental health among entrepreneurs is the silent threat no one's talking about."
-    with open("test_codees_minimal.png", "wb") as f:
-        f.write(generate_flyer(p5).read())
 
     # Test 6: Codees Hero
-    print("Generating Codees Hero...")
     p6 = base_params.copy()
     p6["template_id"] = "codees_hero"
     p6["headline"] = "Digital Transformation in Traditional Industries"
     p6["tagline"] = "Success Stories From Africa"
-    with open("test_codees_hero.png", "wb") as f:
-        f.write(generate_flyer(p6).read())
+
+    items = [
+        ("test_zenith.png", p1),
+        ("test_elite.png", p2),
+        ("test_bold.png", p3),
+        ("test_social.png", p4),
+        ("test_codees_minimal.png", p5),
+        ("test_codees_hero.png", p6),
+    ]
+
+    # The six renders are independent and CPU-bound, so fan out across cores
+    with ProcessPoolExecutor(max_workers=len(items)) as ex:
+        list(ex.map(_render, items))
 
 if __name__ == "__main__":
     if not os.path.exists("image.png"):
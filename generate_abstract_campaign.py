@@ -5,7 +5,7 @@ Generate Codees-CM abstract business flyers + social media posts.
 import os
 import io
 import json
-from flyer_generator import generate_flyer
+from flyer_generator import generate_flyers
 
 COMMON = {
     "logo_path": "logo/image.png",
@@ -125,12 +125,12 @@ def run():
 
     api_bodies = {}
 
-    for item in campaign_data:
-        print(f"Generating: {item['id']}...")
-        img_data = generate_flyer(item["params"])
-        fname = f"campaign/abstract/codees_{item['id']}.png"
-        with open(fname, "wb") as f:
-            f.write(img_data.read())
+    # Flyers and social posts render independently, so run the whole batch
+    # across cores; workers stream each PNG straight to its file
+    print(f"Generating {len(campaign_data)} images...")
+    fnames = [f"campaign/abstract/codees_{item['id']}.png" for item in campaign_data]
+    generate_flyers([item["params"] for item in campaign_data], out_paths=fnames)
+    for item, fname in zip(campaign_data, fnames):
         api_bodies[item["id"]] = item["params"]
         print(f"  -> Saved: {fname}")
 
@@ -1,7 +1,16 @@
 import os
 import io
 import json
-from flyer_generator import generate_flyer
+import hashlib
+import shutil
+from flyer_generator import generate_flyers
+
+def _cache_file(params):
+    """Stable cache path for a params dict: identical inputs render identical
+    PNGs, so reruns during development can skip finished items."""
+    key = hashlib.blake2b(
+        json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+    return os.path.join(".flyer_cache", f"{key}.png")
 
 def generate_campaign():
     if not os.path.exists("campaign"):
@@ -116,12 +125,22 @@ def generate_campaign():
 
     api_bodies = {}
 
-    for item in campaign_data:
-        print(f"Generating flyer: {item['id']}...")
-        img_data = generate_flyer(item['params'])
+    # Render into a content-addressed cache so reruns only regenerate items
+    # whose params changed; the batch itself fans out across cores with
+    # workers streaming each PNG straight to its cache file
+    os.makedirs(".flyer_cache", exist_ok=True)
+    cache_files = [_cache_file(item['params']) for item in campaign_data]
+    fresh = [(item['params'], cached) for item, cached in zip(campaign_data, cache_files)
+             if not os.path.exists(cached)]
+    print(f"Generating {len(fresh)} of {len(campaign_data)} flyers ({len(campaign_data) - len(fresh)} cached)...")
+    if fresh:
+        generate_flyers([params for params, _ in fresh],
+                        out_paths=[cached for _, cached in fresh])
+
+    for item, cached in zip(campaign_data, cache_files):
         filename = f"campaign/codees_{item['id']}.png"
-        with open(filename, "wb") as f:
-            f.write(img_data.read())
+        shutil.copyfile(cached, filename)
+        print(f"Saved flyer: {filename}")
         api_bodies[item['id']] = item['params']
     
     with open("campaign_api_bodies.json", "w") as f:
@@ -0,0 +1,18 @@
+import multiprocessing
+
+# Flyer rendering is CPU-bound (PIL rasterization), so prefork across cores
+# instead of piling threads onto one GIL.
+workers = multiprocessing.cpu_count()
+worker_class = 'gthread'
+threads = 2
+# Tell the app how many workers share the host so each one sizes its render
+# pool to its slice of the cores instead of cpu_count() each (N workers x
+# N-process pools would oversubscribe the machine N-fold).
+raw_env = [f"FLYER_WEB_WORKERS={workers}"]
+timeout = 120
+# Recycle workers periodically to keep PIL memory growth in check
+max_requests = 500
+max_requests_jitter = 50
+# Import the app before forking so font/template caches are shared via COW
+preload_app = True
+bind = '0.0.0.0:5000'
@@ -1,6 +1,7 @@
 import requests
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 requests_data = [
     {
@@ -33,17 +34,30 @@ url = "http://localhost:5000/generate-flyer"
 output_dir = "test_results"
 os.makedirs(output_dir, exist_ok=True)
 
-for i, data in enumerate(requests_data, 1):
-    print(f"Sending request for template {i}...")
+# One Session reuses the TCP connection pool instead of a fresh handshake
+# per request
+session = requests.Session()
+
+def send(item):
+    i, data = item
     try:
-        response = requests.post(url, json=data)
-        if response.status_code == 200:
-            output_path = os.path.join(output_dir, f"result_template_{i}.png")
-            with open(output_path, "wb") as f:
-                f.write(response.content)
-            print(f"Saved to {output_path}")
-        else:
-            print(f"Error for template {i}: {response.status_code}")
-            print(response.text)
+        return i, session.post(url, json=data), None
     except Exception as e:
-        print(f"Failed to connect for template {i}: {e}")
+        return i, None, e
+
+# Fire the requests concurrently so the server renders while the client
+# waits on the others; results come back in submit order
+with ThreadPoolExecutor(max_workers=len(requests_data)) as ex:
+    results = ex.map(send, enumerate(requests_data, 1))
+
+for i, response, error in results:
+    if error is not None:
+        print(f"Failed to connect for template {i}: {error}")
+    elif response.status_code == 200:
+        output_path = os.path.join(output_dir, f"result_template_{i}.png")
+        with open(output_path, "wb") as f:
+            f.write(response.content)
+        print(f"Saved to {output_path}")
+    else:
+        print(f"Error for template {i}: {response.status_code}")
+        print(response.text)
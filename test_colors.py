@@ -1,3 +1,4 @@
+import os
 import sys
 import json
 from PIL import ImageDraw
@@ -6,10 +7,15 @@ from PIL import ImageDraw
 original_text = ImageDraw.ImageDraw.text
 
 def text_interceptor(self, xy, text, fill=None, font=None, anchor=None, spacing=4, align='left', direction=None, features=None, language=None, stroke_width=0, stroke_fill=None, embedded_color=False, *args, **kwargs):
-    print(f"DRAWING TEXT: '{text}' at {xy} with fill={fill}")
+    sys.stderr.write(f"DRAWING TEXT: '{text}' at {xy} with fill={fill}\n")
     return original_text(self, xy, text, fill=fill, font=font, anchor=anchor, spacing=spacing, align=align, direction=direction, features=features, language=language, stroke_width=stroke_width, stroke_fill=stroke_fill, embedded_color=embedded_color, *args, **kwargs)
 
-ImageDraw.ImageDraw.text = text_interceptor
+# Patching at import time would add a stdout write (serialized under the GIL)
+# to every .text call in any process that imports this module alongside batch
+# generation. Only install the interceptor when tracing is actually wanted:
+# when this file runs as a script, or when FLYER_TRACE_TEXT is set.
+if __name__ == "__main__" or os.getenv("FLYER_TRACE_TEXT"):
+    ImageDraw.ImageDraw.text = text_interceptor
 
 # Now import flyer_generator
 from flyer_generator import generate_flyer
@@ -18,17 +24,18 @@ def check(id_name, config):
     print(f"--- Checking {id_name} ---")
     generate_flyer(config)
 
-check("9_projects", {
-    "template_id": "codees_minimal",
-    "headline": "Building Cameroon's Digital Future, Together",
-    "tagline": "Open-source projects powered by the Codees community.",
-    "cta_text": "EXPLORE PROJECTS"
-})
+if __name__ == "__main__":
+    check("9_projects", {
+        "template_id": "codees_minimal",
+        "headline": "Building Cameroon's Digital Future, Together",
+        "tagline": "Open-source projects powered by the Codees community.",
+        "cta_text": "EXPLORE PROJECTS"
+    })
 
-check("10_impact", {
-    "template_id": "codees_hero",
-    "headline": "Real Impact. Real Stories.",
-    "tagline": "Success · Innovation · Community",
-    "image_path": "image.png",
-    "cta_text": "www.codees-cm.com"
-})
+    check("10_impact", {
+        "template_id": "codees_hero",
+        "headline": "Real Impact. Real Stories.",
+        "tagline": "Success · Innovation · Community",
+        "image_path": "image.png",
+        "cta_text": "www.codees-cm.com"
+    })